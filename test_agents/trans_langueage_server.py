@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+trans_langueage.py 용 asyncio HTTP 서버(표준 라이브러리만 사용)
+
+엔드포인트:
+  POST /playground/translate_language/text
+    - JSON {"text", "target_lang", "previous_context"} → {"translated": "..."}
+    - target_lang 이 리스트면 translate_text_llm_multi → {"translations": {언어: 번역문}}
+  POST /playground/translate_language/pdf?pages=1-3,7&target_lang=ko
+    - 본문: PDF 바이트 → 응답: 번역된 PDF 바이트(application/pdf)
+  POST   /playground/translate_language/pdf/jobs?pages=..&priority=..&target_lang=..  → 202 {"job_id", ...}
+  GET    /playground/translate_language/pdf/jobs/<id>         진행률(pages_done/total, segments_done, eta_sec)
+  GET    /playground/translate_language/pdf/jobs/<id>/result  완료 시 PDF 바이트(미완료 409)
+  DELETE /playground/translate_language/pdf/jobs/<id>         취소(페이지/세그먼트 경계에서 중단)
+  GET  /healthz   프로세스 생존 확인(항상 200)
+  GET  /readyz    모델 적재 상태 반영(preload 미완료/적재 오류 → 503)
+                  + 큐/singleflight/캐시 적중/모델 락 대기/적재·언로딩 횟수(부하 측정용)
+
+동작:
+  - 요청은 종류별(text/pdf) 제한 큐로 받고, 큐가 차면 즉시 429(Retry-After)
+  - 모델/PDF 작업은 종류별 전용 ThreadPoolExecutor 에서 실행(이벤트 루프 비차단)
+  - 요청 제한 시간 초과 → 504(아직 시작 전이면 실행하지 않고 버림; 실행 중인 작업은 끝까지 돌고 결과만 버림)
+  - 응답 헤더 X-Queue-Wait-Ms: 큐 대기 시간(ms)
+  - PDF 는 동기/비동기 모두 tl 의 작업 관리자(submit_pdf_job)로 실행 → fitz 호출은 스레드 1개에서만,
+    짧은 문서가 긴 문서 페이지 사이에 끼어들어 먼저 끝남
+  - 비동기 PDF 작업(/pdf/jobs): 대기/실행 중 작업 수가 --max-queue 에 닿으면 429(Retry-After),
+    업로드 파일 쓰기는 이벤트 루프 밖(executor)에서, 작업 디렉토리는 결과 조회/취소 시 또는
+    작업 관리자에서 밀려났거나(AX_TR_JOB_KEEP) 끝난 지 --job-ttl 초가 지나면 삭제
+
+사용법:
+  python trans_langueage_server.py [--host 0.0.0.0] [--port 18014] [--preload]
+  python trans_langueage_server.py --stub --stub-latency-ms 80    # 스텁 모델(부하 테스트용, 모델 로딩 없음)
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import trans_langueage as tl
+
+logger = logging.getLogger(__name__)
+
+_REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    410: "Gone",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[dict] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+# ────────────── 제한 큐 + 전용 executor ──────────────
+class _Job:
+    __slots__ = ("fn", "future", "enqueued", "started")
+
+    def __init__(self, fn: Callable, future: asyncio.Future):
+        self.fn = fn
+        self.future = future
+        self.enqueued = time.monotonic()
+        self.started: Optional[float] = None
+
+
+class _Lane:
+    """작업 종류 1개(text/pdf): 제한 asyncio.Queue + 소비 태스크 N개 + 전용 스레드 풀(N)."""
+
+    def __init__(self, name: str, workers: int, max_queue: int, timeout: float):
+        self.name = name
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_queue))
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"tr-{name}")
+        self.tasks: list[asyncio.Task] = []
+        self.running = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def start(self) -> None:
+        self.tasks = [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job: _Job = await self.queue.get()
+            try:
+                if job.future.done():  # 대기 중 제한 시간 초과/연결 종료 → 실행하지 않음
+                    continue
+                job.started = time.monotonic()
+                self.running += 1
+                try:
+                    res = await loop.run_in_executor(self.executor, job.fn)
+                except Exception as e:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                else:
+                    if not job.future.done():
+                        job.future.set_result(res)
+                finally:
+                    self.running -= 1
+            finally:
+                self.queue.task_done()
+
+    async def submit(self, fn: Callable):
+        """큐에 넣고 결과를 기다림 → (결과, 큐 대기 ms). 큐가 차면 429, 제한 시간 초과면 504."""
+        job = _Job(fn, asyncio.get_running_loop().create_future())
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise HttpError(429, f"{self.name} queue full", {"Retry-After": "1"})
+        try:
+            res = await asyncio.wait_for(asyncio.shield(job.future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            job.future.cancel()
+            raise HttpError(504, f"{self.name} request timed out after {self.timeout:g}s")
+        except asyncio.CancelledError:
+            job.future.cancel()
+            raise
+        wait_ms = ((job.started or job.enqueued) - job.enqueued) * 1000.0
+        return res, wait_ms
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "max_queue": self.queue.maxsize,
+            "running": self.running,
+            "workers": self.workers,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+    async def close(self) -> None:
+        for t in self.tasks:
+            t.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _write_file(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _public_job_status(st: dict) -> dict:
+    """작업 상태에서 서버 내부 경로 제거."""
+    return {k: v for k, v in st.items() if k not in ("in_pdf", "out_pdf")}
+
+
+# ────────────── 서버 ──────────────
+class TranslateServer:
+    TEXT_PATH = "/playground/translate_language/text"
+    PDF_PATH = "/playground/translate_language/pdf"
+    JOBS_PATH = "/playground/translate_language/pdf/jobs"
+
+    def __init__(
+        self,
+        *,
+        max_queue: int = 64,
+        text_workers: int = 1,
+        pdf_workers: int = 1,
+        text_timeout: float = 120.0,
+        pdf_timeout: float = 1800.0,
+        max_body_mb: float = 200.0,
+        preload: bool = False,
+        job_ttl: float = 3600.0,
+    ):
+        self.max_queue = max_queue
+        self.text_workers = text_workers
+        self.pdf_workers = pdf_workers
+        self.text_timeout = text_timeout
+        self.pdf_timeout = pdf_timeout
+        self.max_body = int(max_body_mb * 1024 * 1024)
+        self.preload = preload
+        self.preloaded = not preload
+        self.lanes: dict[str, _Lane] = {}
+        self.job_root = tempfile.mkdtemp(prefix="tr-jobs-")
+        self.job_ttl = job_ttl
+        self.jobs: dict[str, str] = {}  # /pdf/jobs 로 받은 작업 id → 작업 디렉토리(결과 조회 전까지)
+        self.jobs_uploading = 0
+        self.jobs_rejected = 0
+        self._sweeper: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self, host: str, port: int) -> None:
+        self.lanes = {
+            "text": _Lane("text", self.text_workers, self.max_queue, self.text_timeout),
+            "pdf": _Lane("pdf", self.pdf_workers, self.max_queue, self.pdf_timeout),
+        }
+        for lane in self.lanes.values():
+            lane.start()
+        self._sweeper = asyncio.create_task(self._sweep_jobs_loop())
+        if self.preload:
+            asyncio.create_task(self._preload())
+        self._server = await asyncio.start_server(self._handle_conn, host, port)
+        port = self._server.sockets[0].getsockname()[1] if self._server.sockets else port
+        logger.info("translate server listening on %s:%d (backend=%s)", host, port, tl.model_state().get("backend"))
+
+    async def _preload(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.lanes["text"].executor, tl.warmup_model)
+        except Exception as e:
+            logger.error("모델 사전 적재 실패: %s", e)
+            return
+        self.preloaded = True
+
+    async def serve_forever(self) -> None:
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+        for lane in self.lanes.values():
+            await lane.close()
+        shutil.rmtree(self.job_root, ignore_errors=True)
+        tl.shutdown_worker_pool()
+
+    # ── HTTP/1.1 (keep-alive, Content-Length 본문만) ──
+    async def _handle_conn(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 413, {"error": "header too large"}, keep_alive=False)
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._send(writer, 400, {"error": "bad request line"}, keep_alive=False)
+                    break
+                headers = {}
+                for ln in lines[1:]:
+                    if ":" in ln:
+                        k, v = ln.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                conn = headers.get("connection", "").lower()
+                keep_alive = conn != "close" if version == "HTTP/1.1" else conn == "keep-alive"
+
+                raw_len = headers.get("content-length", "") or "0"
+                if not (raw_len.isascii() and raw_len.isdigit()):  # 음수/숫자 아님 → 본문 경계를 알 수 없으므로 연결 종료
+                    await self._send(writer, 400, {"error": f"invalid Content-Length: {raw_len!r}"}, keep_alive=False)
+                    break
+                length = int(raw_len)
+                if length > self.max_body:
+                    await self._send(writer, 413, {"error": "body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                extra: dict = {}
+                try:
+                    status, payload, extra = await self._route(method, target, headers, body)
+                except HttpError as e:
+                    status, payload, extra = e.status, {"error": str(e)}, e.headers
+                except Exception as e:
+                    logger.exception("request failed: %s %s", method, target)
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                await self._send(writer, status, payload, extra, keep_alive=keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _send(self, writer, status: int, payload, extra: Optional[dict] = None, *, keep_alive: bool = True) -> None:
+        if isinstance(payload, (bytes, bytearray)):
+            body, ctype = bytes(payload), "application/pdf"
+        else:
+            body, ctype = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8"
+        hdrs = {
+            "Content-Type": ctype,
+            "Content-Length": str(len(body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+        }
+        hdrs.update(extra or {})
+        head = f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}\r\n"
+        head += "".join(f"{k}: {v}\r\n" for k, v in hdrs.items()) + "\r\n"
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _route(self, method: str, target: str, headers: dict, body: bytes):
+        url = urlsplit(target)
+        path, query = url.path.rstrip("/") or "/", parse_qs(url.query)
+
+        if path == "/healthz":
+            return 200, {"status": "ok"}, {}
+        if path == "/readyz":
+            st = tl.model_state()
+            ready = self.preloaded and st["state"] != "error"
+            payload = dict(st, ready=ready, preloaded=self.preloaded,
+                           lanes={k: v.stats() for k, v in self.lanes.items()},
+                           singleflight=tl.singleflight_stats(),
+                           caches=tl.cache_stats(), llm_lock=tl.lock_wait_stats(), pdf_jobs=self._jobs_stats())
+            return (200 if ready else 503), payload, {}
+        if path == self.TEXT_PATH:
+            if method != "POST":
+                raise HttpError(405, "POST only")
+            return await self._translate_text(body)
+        if path == self.PDF_PATH:
+            if method != "POST":
+                raise HttpError(405, "POST only")
+            return await self._translate_pdf(body, query)
+        if path == self.JOBS_PATH:
+            if method != "POST":
+                raise HttpError(405, "POST only")
+            if self._pending_jobs() >= self.max_queue:
+                self.jobs_rejected += 1
+                raise HttpError(429, "pdf job queue full", {"Retry-After": "5"})
+            self.jobs_uploading += 1  # 파일 쓰는 동안 들어온 요청도 한도에 포함
+            try:
+                job_id = await self._submit_pdf_job(body, query)
+            finally:
+                self.jobs_uploading -= 1
+            st = tl.pdf_job_status(job_id)
+            self.jobs[job_id] = os.path.dirname(st["in_pdf"])
+            return 202, _public_job_status(st), {}
+        if path.startswith(self.JOBS_PATH + "/"):
+            return self._pdf_job(method, path[len(self.JOBS_PATH) + 1 :])
+        raise HttpError(404, f"no route for {path}")
+
+    async def _translate_text(self, body: bytes):
+        try:
+            req = json.loads(body.decode("utf-8") or "{}")
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise HttpError(400, f"invalid JSON: {e}")
+        if not isinstance(req, dict):
+            raise HttpError(400, "JSON object expected")
+        text = req.get("text")
+        if not isinstance(text, str):
+            raise HttpError(400, "'text' (string) is required")
+        target = req.get("target_lang") or "ko"
+        ctx = req.get("previous_context") or ""
+
+        if isinstance(target, list):
+            fn = lambda: {"translations": tl.translate_text_llm_multi(text, target, previous_context=ctx)}
+        else:
+            fn = lambda: {"translated": tl.translate_text_llm(text, target_lang=target, previous_context=ctx)}
+        try:
+            res, wait_ms = await self.lanes["text"].submit(fn)
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        return 200, res, {"X-Queue-Wait-Ms": f"{wait_ms:.1f}"}
+
+    async def _submit_pdf_job(self, body: bytes, query: dict) -> str:
+        if not body.startswith(b"%PDF"):
+            raise HttpError(400, "PDF body expected")
+        pages = (query.get("pages") or [None])[0]
+        prio = (query.get("priority") or [None])[0]
+        try:
+            target = tl._norm_lang_code((query.get("target_lang") or ["ko"])[0])
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        try:
+            priority = float(prio) if prio is not None else None
+        except ValueError:
+            raise HttpError(400, f"invalid priority: {prio!r}")
+        td = tempfile.mkdtemp(prefix="job-", dir=self.job_root)
+        src = os.path.join(td, "in.pdf")
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, _write_file, src, body)
+        except OSError:
+            shutil.rmtree(td, ignore_errors=True)
+            raise
+        return tl.submit_pdf_job(
+            src, os.path.join(td, "out.pdf"), priority=priority, pages=pages, target_lang=target
+        )
+
+    def _job_status(self, job_id: str) -> dict:
+        try:
+            return tl.pdf_job_status(job_id)
+        except KeyError:
+            raise HttpError(404, f"unknown job {job_id}")
+
+    def _drop_job_files(self, st: dict) -> None:
+        self.jobs.pop(st["job_id"], None)
+        shutil.rmtree(os.path.dirname(st["in_pdf"]), ignore_errors=True)
+
+    def _pending_jobs(self) -> int:
+        """/pdf/jobs 로 받은 작업 중 대기/실행 중인 것 + 업로드 중인 요청 수."""
+        n = self.jobs_uploading
+        for job_id in list(self.jobs):
+            try:
+                n += tl.pdf_job_status(job_id)["state"] in ("queued", "running")
+            except KeyError:
+                pass
+        return n
+
+    def _jobs_stats(self) -> dict:
+        return {
+            "pending": self._pending_jobs(),
+            "max_pending": self.max_queue,
+            "tracked": len(self.jobs),
+            "rejected": self.jobs_rejected,
+        }
+
+    def _sweep_jobs(self) -> int:
+        """작업 관리자에서 밀려났거나(결과 조회 불가) 끝난 지 job_ttl 초가 지난 작업의 디렉토리 삭제."""
+        now = time.time()
+        dropped = 0
+        for job_id, td in list(self.jobs.items()):
+            try:
+                st = tl.pdf_job_status(job_id)
+            except KeyError:
+                st = None
+            if st is None or (st["finished"] is not None and now - st["finished"] > self.job_ttl):
+                self.jobs.pop(job_id, None)
+                shutil.rmtree(td, ignore_errors=True)
+                dropped += 1
+        if dropped:
+            logger.info("pdf jobs: %d job dirs removed (evicted/expired)", dropped)
+        return dropped
+
+    async def _sweep_jobs_loop(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, min(60.0, self.job_ttl / 2)))
+            try:
+                self._sweep_jobs()
+            except Exception as e:
+                logger.warning("pdf job sweep failed: %s", e)
+
+    def _pdf_job(self, method: str, rest: str):
+        job_id, _, sub = rest.partition("/")
+        st = self._job_status(job_id)
+        if method == "DELETE" and not sub:
+            cancelled = tl.cancel_pdf_job(job_id)
+            if tl.pdf_job_status(job_id)["state"] == "cancelled":
+                self._drop_job_files(st)
+            return 200, {"job_id": job_id, "cancelled": cancelled}, {}
+        if method != "GET":
+            raise HttpError(405, "GET/DELETE only")
+        if not sub:
+            return 200, _public_job_status(st), {}
+        if sub != "result":
+            raise HttpError(404, f"no route for {sub}")
+        if st["state"] != "done":
+            raise HttpError(409, f"job {job_id} is {st['state']}" + (f": {st['error']}" if st["error"] else ""))
+        if not os.path.exists(st["out_pdf"]):
+            raise HttpError(410, f"result of job {job_id} expired")
+        with open(st["out_pdf"], "rb") as f:
+            data = f.read()
+        self._drop_job_files(st)
+        return 200, data, {}
+
+    async def _translate_pdf(self, body: bytes, query: dict):
+        job_id = await self._submit_pdf_job(body, query)
+        try:
+            st, wait_ms = await self.lanes["pdf"].submit(lambda: tl.wait_pdf_job(job_id))
+        except HttpError:
+            tl.cancel_pdf_job(job_id)
+            st = tl.pdf_job_status(job_id)
+            if st["state"] == "cancelled":  # 실행 전 취소 → 바로 정리(실행 중이면 경계에서 멈춘 뒤 남김)
+                self._drop_job_files(st)
+            raise
+        try:
+            if st["state"] != "done":
+                err = st["error"] or st["state"]
+                raise HttpError(400 if err.startswith("ValueError") else 500, err)
+            with open(st["out_pdf"], "rb") as f:
+                data = f.read()
+        finally:
+            self._drop_job_files(st)
+        return 200, data, {"X-Queue-Wait-Ms": f"{wait_ms:.1f}"}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=18014)
+    ap.add_argument("--max-queue", type=int, default=64, help="종류별 대기 큐 길이(초과 시 429)")
+    ap.add_argument("--workers", type=int, default=None, help="모델 워커 프로세스 수(AX_TR_WORKERS 덮어쓰기, 0=단일 프로세스)")
+    ap.add_argument("--text-workers", type=int, default=1)
+    ap.add_argument("--pdf-workers", type=int, default=1)
+    ap.add_argument("--timeout", type=float, default=120.0, help="텍스트 요청 제한 시간(초)")
+    ap.add_argument("--pdf-timeout", type=float, default=1800.0, help="PDF 요청 제한 시간(초)")
+    ap.add_argument("--max-body-mb", type=float, default=200.0)
+    ap.add_argument("--job-ttl", type=float, default=3600.0, help="끝난 비동기 PDF 작업 파일 보관 시간(초)")
+    ap.add_argument("--preload", action="store_true", help="시작 시 모델 적재(완료 전 /readyz 503)")
+    ap.add_argument("--stub", action="store_true", help="스텁 모델 사용(AX_TR_STUB_MODEL=1 과 동일)")
+    ap.add_argument("--stub-latency-ms", type=float, default=None)
+    ap.add_argument("--stub-load-ms", type=float, default=None, help="스텁 모델 적재 지연(AX_TR_STUB_LOAD_MS)")
+    args = ap.parse_args(argv)
+
+    if args.stub:
+        tl._STUB_MODEL = True
+    if args.stub_latency_ms is not None:
+        tl._STUB_LATENCY_MS = args.stub_latency_ms
+    if args.stub_load_ms is not None:
+        tl._STUB_LOAD_MS = args.stub_load_ms
+    if args.workers is not None:
+        tl._WORKERS = args.workers
+
+    server = TranslateServer(
+        max_queue=args.max_queue,
+        text_workers=max(args.text_workers, tl._WORKERS),
+        pdf_workers=args.pdf_workers,
+        text_timeout=args.timeout,
+        pdf_timeout=args.pdf_timeout,
+        max_body_mb=args.max_body_mb,
+        preload=args.preload,
+        job_ttl=args.job_ttl,
+    )
+
+    async def run():
+        await server.start(args.host, args.port)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())